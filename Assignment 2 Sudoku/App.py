@@ -3,6 +3,8 @@ from Game import Game
 from Sudoku import Sudoku
 
 sudoku_folder = os.path.join(os.path.dirname(__file__), "Sudokus")
+# Time limit in seconds for solving a single sudoku
+solve_timeout = 20
 
 class App:
 
@@ -11,7 +13,12 @@ class App:
     def solve_sudoku(sudoku_file):
         game = Game(Sudoku(sudoku_file))
         game.show_sudoku()
-        if (game.solve() and game.valid_solution()):
+        try:
+            solved = game.solve(timeout=solve_timeout) and game.valid_solution()
+        except TimeoutError:
+            print(f"Solving took longer than {solve_timeout} seconds")
+            solved = False
+        if solved:
             print("Solved!")
             game.show_sudoku()
         else:
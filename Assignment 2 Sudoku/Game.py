@@ -1,11 +1,18 @@
-from collections import deque
+from array import array
 import time
 
+from Sudoku import COL_OF, NEIGHBORS, ROW_OF
+from solver_core import (ASSIGNMENTS, CONSTRAINT_CHECKS, COVER_COLUMN_COUNT, COVER_COLUMNS, COVER_ROW_COUNT,
+                         COVER_ROWS, DOMAIN_REDUCTIONS, INCOMING_ARCS, KERNEL_NEIGHBORS, QUEUE_SIZE, RECURSIVE_CALLS,
+                         SOLVED, TIMED_OUT, TRAIL_SIZE, ac3, as_kernel_array, backtrack, exact_cover, is_consistent,
+                         new_array)
+
 
 class Game:
     def __init__(self, sudoku, feedback=False, enable_preprocessing=True,
                  use_mrv_ac3=False, use_degree_ac3=False,
-                 use_mrv_backtracking=False, use_degree_backtracking=False):
+                 use_mrv_backtracking=False, use_degree_backtracking=False, use_lcv_backtracking=False,
+                 use_exact_cover=False):
         """
         Initialize the Game class with optional heuristics and feedback.
         @param sudoku: The Sudoku puzzle to solve.
@@ -15,6 +22,8 @@ class Game:
         @param use_degree_ac3: Boolean to enable Degree Heuristic in AC-3.
         @param use_mrv_backtracking: Boolean to enable MRV heuristic in Backtracking.
         @param use_degree_backtracking: Boolean to enable Degree Heuristic in Backtracking.
+        @param use_lcv_backtracking: Boolean to enable Least Constraining Value ordering in Backtracking.
+        @param use_exact_cover: Boolean to search with Algorithm X on the exact cover encoding instead of Backtracking.
         """
         self.sudoku = sudoku
         self.feedback = feedback
@@ -23,117 +32,123 @@ class Game:
         self.use_degree_ac3 = use_degree_ac3
         self.use_mrv_backtracking = use_mrv_backtracking
         self.use_degree_backtracking = use_degree_backtracking
-        self.queue = deque()
-        self.recursive_calls = 0
-        self.constraint_checks = 0
-        self.domain_reductions = 0
-        self.assignments = 0
+        self.use_lcv_backtracking = use_lcv_backtracking
+        self.use_exact_cover = use_exact_cover
+        # Views on the board buffers in the form the solver kernels expect
+        self.values = as_kernel_array(sudoku.values, 'B')
+        self.domains = as_kernel_array(sudoku.domains, 'H')
+        self.counters = new_array('q', 4)
         self.start_time = None
+        self.timeout = 0
         self.end_time = None
-        self.empty_cells = sum(1 for row in sudoku.get_board() for field in row if not field.is_finalized())
+        self.empty_cells = sudoku.values.count(0)
 
         if self.enable_preprocessing:
             if self.feedback:
                 print("Preprocessing constraints...")
             self.preprocess_constraints()
 
+    @property
+    def recursive_calls(self):
+        return int(self.counters[RECURSIVE_CALLS])
+
+    @property
+    def constraint_checks(self):
+        return int(self.counters[CONSTRAINT_CHECKS])
+
+    @property
+    def domain_reductions(self):
+        return int(self.counters[DOMAIN_REDUCTIONS])
+
+    @property
+    def assignments(self):
+        return int(self.counters[ASSIGNMENTS])
+
     def ac3(self) -> bool:
         """
         Applies the AC-3 algorithm to enforce arc consistency.
         Uses heuristics to prioritize arcs if enabled.
         """
-        board = self.sudoku.get_board()
-        self.queue = deque([(field, neighbor) for row in board for field in row for neighbor in field.get_neighbours()])
+        values = self.sudoku.values
+        domains = self.sudoku.domains
+        if self.feedback:
+            values_before = bytes(values)
+            domains_before = array('H', domains)
 
-        while self.queue:
-            xi, xj = self.queue.popleft()
-            if self.revise(xi, xj):
-                if xi.get_domain_size() == 0:  # Domain wipeout
-                    return False
+        result = ac3(self.values, self.domains, KERNEL_NEIGHBORS, INCOMING_ARCS, new_array('i', QUEUE_SIZE),
+                     self.counters, self.use_mrv_ac3, self.use_degree_ac3)
 
-                # Re-add arcs involving xi
-                neighbors = xi.get_other_neighbours(xj)
-                if self.use_mrv_ac3:
-                    neighbors = sorted(neighbors, key=lambda n: n.get_domain_size())
-                if self.use_degree_ac3:
-                    neighbors = sorted(
-                        neighbors,
-                        key=lambda n: len([nb for nb in n.get_neighbours() if not nb.is_finalized()]),
-                        reverse=True
-                    )
-                for xk in neighbors:
-                    self.queue.append((xk, xi))
-        return True
+        if self.feedback:
+            for field in range(81):
+                row_idx, col_idx = ROW_OF[field], COL_OF[field]
+                removed = domains_before[field] & ~domains[field]
+                for value in range(1, 10):
+                    if removed >> value & 1:
+                        print(f"Removed {value} from domain of Field at ({row_idx}, {col_idx})")
+                if values[field] != values_before[field]:
+                    print(f"Field at ({row_idx}, {col_idx}) finalized with {values[field]}")
+        return result
 
     def backtracking_search(self) -> bool:
         """
         Performs backtracking search to assign values to all fields.
-        Uses heuristics for variable selection if enabled.
-        """
-        self.recursive_calls += 1
-        # Add a timeout check periodically
-        if self.timeout and (time.time() - self.start_time) > self.timeout:
+        Uses heuristics for variable selection and value ordering if enabled.
+        """
+        result = backtrack(self.values, self.domains, KERNEL_NEIGHBORS, self.counters,
+                           self.use_mrv_backtracking, self.use_degree_backtracking, self.use_lcv_backtracking,
+                           self.start_time, float(self.timeout or 0),
+                           new_array('b', 81), new_array('H', 81), new_array('i', TRAIL_SIZE), new_array('i', 81),
+                           new_array('b', 81), new_array('b', 81))
+        if result == TIMED_OUT:
             raise TimeoutError("Solving exceeded time limit")
-        unassigned = self.get_unassigned_fields()
-        if not unassigned:
-            return True
-
-        field = unassigned[0]  # Default choice
-        if self.use_mrv_backtracking:
-            field = min(unassigned, key=lambda f: f.get_domain_size())
-        if self.use_degree_backtracking:
-            min_domain_size = field.get_domain_size()
-            candidates = [f for f in unassigned if f.get_domain_size() == min_domain_size]
-            field = max(candidates, key=lambda f: len([n for n in f.get_neighbours() if not n.is_finalized()]))
-
-        for value in field.get_domain():
-            self.constraint_checks += 1
-            if self.is_consistent(field, value):
-                field.set_value(value)
-                self.assignments += 1
-                if self.backtracking_search():
-                    return True
-                field.set_value(0)
+        return result == SOLVED
 
-        return False
+    def exact_cover_search(self) -> bool:
+        """
+        Searches for the assignment of the remaining fields as an exact cover with Algorithm X,
+        starting from the domains left by AC-3.
+        """
+        result = exact_cover(self.values, self.domains, COVER_ROWS, COVER_COLUMNS, self.counters,
+                             new_array('q', 4), self.start_time, float(self.timeout or 0),
+                             new_array('b', COVER_COLUMN_COUNT), new_array('b', COVER_COLUMN_COUNT),
+                             new_array('b', COVER_ROW_COUNT),
+                             new_array('h', 81), new_array('b', 81), new_array('h', 81))
+        if result == TIMED_OUT:
+            raise TimeoutError("Solving exceeded time limit")
+        return result == SOLVED
 
     def preprocess_constraints(self):
         """
         Preprocess the Sudoku board by ensuring all domains are consistent with known values.
         This eliminates invalid values from the domains of non-finalized neighbors.
         """
-        board = self.sudoku.get_board()
+        values = self.sudoku.values
+        domains = self.sudoku.domains
 
-        for row in board:
-            for field in row:
-                if field.is_finalized():
-                    value = field.get_value()
-                    for neighbor in field.get_neighbours():
-                        if not neighbor.is_finalized():
-                            neighbor.remove_from_domain(value)
-                            if self.feedback:
-                                row_idx, col_idx = self.get_field_coordinates(neighbor)
-                                print(f"Removed {value} from domain of Field at ({row_idx}, {col_idx})")
-
-    def get_field_coordinates(self, field):
-        """
-        Retrieve the (row, col) coordinates of a given field in the Sudoku board.
-        @param field: The Field object to locate.
-        @return: A tuple (row, col) of the field's coordinates.
-        """
-        board = self.sudoku.get_board()
-        for row_index, row in enumerate(board):
-            if field in row:
-                return row_index, row.index(field)
-        return -1, -1  # Not found (should not happen)
+        for field in range(81):
+            if values[field]:
+                value = values[field]
+                for neighbor in NEIGHBORS[field]:
+                    if not values[neighbor] and domains[neighbor] >> value & 1:
+                        domains[neighbor] &= ~(1 << value)
+                        if self.feedback:
+                            row_idx, col_idx = ROW_OF[neighbor], COL_OF[neighbor]
+                            print(f"Removed {value} from domain of Field at ({row_idx}, {col_idx})")
 
     def solve(self, timeout=20) -> bool:
         """
-        Solves the Sudoku puzzle using AC-3 algorithm and backtracking search.
+        Solves the Sudoku puzzle using AC-3 algorithm, followed by backtracking search or, if use_exact_cover
+        is set, by the Algorithm X exact cover search.
         """
-        self.start_time = time.time()  # Start the timer
+        self.start_time = time.monotonic()  # Start the timer
         self.timeout = timeout
 
+        if not self.is_consistent_board():
+            if self.feedback:
+                print("The given values violate the Sudoku rules.")
+            self.end_time = time.monotonic()  # End the timer
+            return False
+
         if self.feedback:
             print("Starting AC-3 algorithm...")
 
@@ -141,68 +156,44 @@ class Game:
             if self.feedback:
                 print("AC-3 failed to solve the puzzle.")
                 self.display_metrics()
-            self.end_time = time.time()  # End the timer
+            self.end_time = time.monotonic()  # End the timer
             return False
 
         if self.is_fully_assigned():
             if self.feedback:
                 print("Sudoku solved successfully with AC-3.")
                 self.display_metrics()
-            self.end_time = time.time()  # End the timer
+            self.end_time = time.monotonic()  # End the timer
             return True
         else:
             if self.feedback:
-                print("AC-3 could not fully solve the puzzle. Proceeding with backtracking search...")
+                search = "exact cover" if self.use_exact_cover else "backtracking"
+                print(f"AC-3 could not fully solve the puzzle. Proceeding with {search} search...")
                 self.display_metrics()
-            result = self.backtracking_search()
-            self.end_time = time.time()  # End the timer
+            try:
+                result = self.exact_cover_search() if self.use_exact_cover else self.backtracking_search()
+            finally:
+                self.end_time = time.monotonic()  # End the timer
             return result
 
-    def get_unassigned_fields(self):
-        return [field for row in self.sudoku.get_board() for field in row if not field.is_finalized()]
-
-    def is_consistent(self, field, value) -> bool:
+    def is_consistent_board(self) -> bool:
         """
-        Checks if assigning 'value' to 'field' is consistent with the Sudoku rules.
+        Checks if the values on the board are consistent with each other. Backtracking relies on this
+        holding for the given values, as it only keeps the values it assigns consistent through forward checking.
+        @return: True if no two neighbouring fields hold the same value, False otherwise.
         """
-        for neighbor in field.get_neighbours():
-            self.constraint_checks += 1  # Increment constraint check count
-            if neighbor.is_finalized() and neighbor.get_value() == value:
-                return False
-        return True
-
-    def revise(self, xi, xj) -> bool:
-        """
-        Revises the domain of xi to maintain arc consistency with xj.
-        Only processes non-finalized fields.
-        @param xi: The current field.
-        @param xj: The neighboring field.
-        @return: True if the domain of xi was revised, False otherwise.
-        """
-        revised = False
-        if xi.is_finalized():
-            return False
-
-        if xj.is_finalized():
-            xj_value = xj.get_value()
-            if xj_value in xi.get_domain():
-                xi.remove_from_domain(xj_value)
-                self.domain_reductions += 1  # Increment domain reductions count
-                revised = True
-                if self.feedback:
-                    xi_row, xi_col = self.get_field_coordinates(xi)
-                    xj_row, xj_col = self.get_field_coordinates(xj)
-                    print(
-                        f"Removed {xj_value} from domain of Field at ({xi_row}, {xi_col}) because Field at ({xj_row}, {xj_col}) is finalized with {xj_value}")
-        return revised
+        values = self.sudoku.values
+        # Checking the givens is not part of solving, so it is counted in scratch counters, not the metrics
+        counters = new_array('q', 4)
+        return all(is_consistent(self.values, KERNEL_NEIGHBORS, counters, field, values[field])
+                   for field in range(81) if values[field])
 
     def is_fully_assigned(self) -> bool:
         """
         Checks if all fields have been assigned a single value.
         @return: True if all fields are assigned, False otherwise.
         """
-        board = self.sudoku.get_board()
-        return all(field.is_finalized() for row in board for field in row)
+        return 0 not in self.sudoku.values
 
     def display_metrics(self):
         total_time = self.end_time - self.start_time
@@ -220,33 +211,28 @@ class Game:
         Checks the validity of a sudoku solution
         @return: true if the sudoku solution is correct, false otherwise
         """
-        # Check each row
-        for row in self.sudoku.get_board():
-            values = [field.get_value() for field in row if field.get_value() != 0]
+        sudoku = self.sudoku
+        # Check each row, ignoring empty fields
+        for row_index in range(9):
+            values = sudoku.get_row(row_index).replace(b"\0", b"")
             if len(values) != len(set(values)):
-                print(f"Invalid row: {self.sudoku.get_board().index(row)}")
+                print(f"Invalid row: {row_index}")
                 return False
 
         # Check each column
         for col_index in range(9):
-            values = [self.sudoku.get_board()[row][col_index].get_value() for row in range(9) if
-                      self.sudoku.get_board()[row][col_index].get_value() != 0]
+            values = sudoku.get_column(col_index).replace(b"\0", b"")
             if len(values) != len(set(values)):
                 print(f"Invalid column: {col_index}")
                 return False
 
         # Check each 3x3 box
-        for box_row in range(3):  # For each box generate box integer
-            for box_col in range(3):
-                values = []
-                for row in range(3):
-                    for col in range(3):
-                        field = self.sudoku.get_board()[box_row * 3 + row][box_col * 3 + col]
-                        if field.get_value() != 0:
-                            values.append(field.get_value())
-                if len(values) != len(set(values)):
-                    print(f"Invalid box: ({box_row}, {box_col})")
-                    return False
+        for box_index in range(9):
+            values = sudoku.get_box(box_index).replace(b"\0", b"")
+            if len(values) != len(set(values)):
+                box_row, box_col = divmod(box_index, 3)
+                print(f"Invalid box: ({box_row}, {box_col})")
+                return False
 
         return True
 
@@ -1,10 +1,67 @@
-from Field import Field
+from array import array
+
+# Domain bitmask with bits 1..9 set; bit 0 is unused so bit v stands for digit v
+ALL_DIGITS = 0x3FE
+# Translation table from cell values 0-9 to their ASCII digits
+DIGIT_CHARS = bytes.maketrans(bytes(range(10)), b"0123456789")
+
+
+# Row, column and box (0-8 in row-major order) of every flat cell index
+ROW_OF = tuple(index // 9 for index in range(81))
+COL_OF = tuple(index % 9 for index in range(81))
+BOX_OF = tuple(row // 3 * 3 + col // 3 for row, col in zip(ROW_OF, COL_OF))
+# Flat indices of the cells in each 3x3 box
+BOX_CELLS = tuple(tuple((box_row + y) * 9 + box_col + x for y in range(3) for x in range(3))
+                  for box_row in (0, 3, 6) for box_col in (0, 3, 6))
+
+
+def _peer_mask(index):
+    """
+    Collects the cells that constrain the given cell as a bitmask
+    @param index: Flat index (row * 9 + col) of the cell
+    @return: 81-bit mask with bit j set for each of the 20 cells j sharing a row, column or 3x3 subgrid with the cell
+    """
+    row, col = ROW_OF[index], COL_OF[index]
+
+    mask = 0
+    for i in range(9):
+        mask |= 1 << row * 9 + i
+        mask |= 1 << i * 9 + col
+    for cell in BOX_CELLS[BOX_OF[index]]:
+        mask |= 1 << cell
+    return mask & ~(1 << index)
+
+
+def _indices_of(mask):
+    """
+    @param mask: Bitmask of cells
+    @return: Tuple of the indices of the set bits, in ascending order
+    """
+    indices = []
+    while mask:
+        lowest = mask & -mask
+        indices.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return tuple(indices)
+
+
+# Peer bitmask and neighbour indices of every cell, computed once and shared by all boards
+PEER_MASK = tuple(_peer_mask(index) for index in range(81))
+NEIGHBORS = tuple(_indices_of(mask) for mask in PEER_MASK)
+# The kernels loop over neighbours without skipping the cell itself, and the arc tables assume 20 slots
+assert all(len(NEIGHBORS[index]) == 20 and index not in NEIGHBORS[index] for index in range(81))
 
 
 class Sudoku:
 
     def __init__(self, filename):
-        self.board = self.read_sudoku(filename)
+        # Flat row-major board: values[i] is the digit in cell i (0 if empty),
+        # domains[i] is the bitmask of candidates left for cell i
+        self.values = self.read_sudoku(filename)
+        self.domains = array('H', [1 << value if value else ALL_DIGITS for value in self.values])
+        # Last result of board_to_string and the values it was rendered from
+        self._string = None
+        self._string_values = None
 
     def __str__(self):
         output = "╔═══════╦═══════╦═══════╗\n"
@@ -14,10 +71,10 @@ class Sudoku:
                 output += "╠═══════╬═══════╬═══════╣\n"
             output += "║ "
             # iterate through columns
-            for j in range(9):
+            for j, value in enumerate(self.get_row(i)):
                 if j == 3 or j == 6:
                     output += "║ "
-                output += str(self.board[i][j]) + " "
+                output += ("." if value == 0 else str(value)) + " "
             output += "║\n"
         output += "╚═══════╩═══════╩═══════╝\n"
         return output
@@ -27,11 +84,10 @@ class Sudoku:
         """
         Read in a sudoku file
         @param filename: Sudoku filename
-        @return: A 9x9 grid of Fields where each field is initialized with all its neighbor fields
+        @return: A bytearray of the 81 cell values in row-major order, 0 for unknown cells
         """
         assert filename is not None and filename != "", "Invalid filename"
-        # Setup 9x9 grid
-        grid = [[Field for _ in range(9)] for _ in range(9)]
+        values = bytearray(81)
 
         try:
             with open(filename, "r") as file:
@@ -39,56 +95,43 @@ class Sudoku:
                     for col_index, char in enumerate(line):
                         if char == '\n':
                             continue
-                        if int(char) == 0:
-                            grid[row][col_index] = Field()
-                        else:
-                            grid[row][col_index] = Field(int(char))
+                        values[row * 9 + col_index] = int(char)
 
         except FileNotFoundError:
             print("Error opening file: " + filename)
 
-        Sudoku.add_neighbours(grid)
-        return grid
+        return values
 
-    @staticmethod
-    def add_neighbours(grid):
+    def get_row(self, index):
         """
-        Adds a list of neighbors to each field
-        @param grid: 9x9 list of Fields
+        @param index: Row number, 0-8 from top to bottom
+        @return: bytearray of the 9 values in the row
         """
-        for row in range(9):
-            for col in range(9):
-                field: Field = grid[row][col]  # Current field for which neighbors are being set
-                neighbors: set[Field] = set()  # Set to hold unique neighbors
-
-                # Check horizontal neighbors
-                for x in range(9):
-                    if x != col:
-                        neighbors.add(grid[row][x])
-
-                # Check vertical neighbors
-                for y in range(9):
-                    if y != row:
-                        neighbors.add(grid[y][col])
-
-                # Divide and round to integer downwards and multiply by 3 to get range of this subgrid
-                subgrid_start_row = row // 3 * 3
-                subgrid_start_col = col // 3 * 3
-                for y in range(subgrid_start_row, subgrid_start_row + 3):
-                    for x in range(subgrid_start_col, subgrid_start_col + 3):
-                        if (y != row or x != col):
-                            neighbors.add(grid[y][x])
-
-                field.set_neighbours(list(neighbors))
+        return self.values[index * 9:index * 9 + 9]
 
-    def board_to_string(self):
+    def get_column(self, index):
+        """
+        @param index: Column number, 0-8 from left to right
+        @return: bytearray of the 9 values in the column
+        """
+        return self.values[index::9]
 
-        output = ""
-        for row in range(len(self.board)):
-            for col in range(len(self.board[row])):
-                output += self.board[row][col].get_value()
-            output += "\n"
-        return output
+    def get_box(self, index):
+        """
+        @param index: 3x3 box number, 0-8 in row-major order
+        @return: bytearray of the 9 values in the box, row by row
+        """
+        start = BOX_CELLS[index][0]
+        return self.values[start:start + 3] + self.values[start + 9:start + 12] + self.values[start + 18:start + 21]
 
-    def get_board(self):
-        return self.board
+    def board_to_string(self):
+        """
+        @return: The board as 9 lines of 9 digits, 0 for unknown cells
+        """
+        # The solver writes into values directly, so the cache is keyed on a copy of the values
+        # instead of being invalidated by a setter
+        if self.values != self._string_values:
+            digits = self.values.translate(DIGIT_CHARS).decode()
+            self._string = "".join(digits[start:start + 9] + "\n" for start in range(0, 81, 9))
+            self._string_values = bytes(self.values)
+        return self._string
@@ -0,0 +1,606 @@
+from array import array
+import time
+
+from Sudoku import BOX_OF, COL_OF, NEIGHBORS, ROW_OF
+
+# The kernels below only do integer arithmetic on flat arrays, so they are compiled with Numba when it
+# is installed. Without Numba they run as plain Python directly on the bytearray/array board buffers.
+# backtrack and exact_cover read the clock in object mode, which releasing the GIL would only make Numba
+# warn about, so they are compiled without nogil.
+try:
+    import numpy as np
+    from numba import njit, objmode
+
+    HAS_NUMBA = True
+except ImportError:
+    from contextlib import nullcontext
+
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """
+        Stand-in for numba.njit that returns the function unchanged.
+        Supports both the bare @njit and the @njit(...) decorator forms.
+        """
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
+
+    def objmode(**kwargs):
+        return nullcontext()
+
+# Indices into the counters array shared by the kernels
+RECURSIVE_CALLS = 0
+CONSTRAINT_CHECKS = 1
+DOMAIN_REDUCTIONS = 2
+ASSIGNMENTS = 3
+
+# Results of revise
+UNCHANGED = 0
+REVISED = 1
+FINALIZED = 2
+WIPED_OUT = 3
+
+# Results of the backtracking search
+UNSOLVABLE = 0
+SOLVED = 1
+TIMED_OUT = 2
+
+# The arc (xi, xj) with xj = NEIGHBORS[xi][slot] is numbered xi * 20 + slot, which fits in the low
+# ARC_BITS bits of a queue entry
+ARC_COUNT = 81 * 20
+ARC_BITS = 11
+ARC_MASK = (1 << ARC_BITS) - 1
+# The AC-3 queue receives the 20 incoming arcs of each field once it is finalized, so it never holds more
+# than ARC_COUNT entries
+QUEUE_SIZE = ARC_COUNT
+# A trail entry records one domain value removed by forward checking as field << 4 | value
+TRAIL_SIZE = 81 * 20
+# Exact cover encoding: row field * 9 + value - 1 stands for placing value in field and covers four
+# columns, one for each constraint it fulfils (field filled, value in row, in column and in box)
+COVER_ROW_COUNT = 81 * 9
+COVER_COLUMN_COUNT = 4 * 81
+# Number of search nodes between two reads of the clock, which keeps time.monotonic() off the hot path
+TIMEOUT_CHECK_INTERVAL = 4096
+
+
+def new_array(typecode, size):
+    """
+    Allocate a zero-filled array the kernels can work on
+    @param typecode: array module typecode, e.g. 'i' for int32
+    @param size: Number of elements
+    @return: A NumPy array if Numba is available, otherwise an array.array
+    """
+    if HAS_NUMBA:
+        return np.zeros(size, dtype=typecode)
+    return array(typecode, bytes(size * array(typecode).itemsize))
+
+
+def as_kernel_array(buffer, typecode):
+    """
+    View a board buffer as an array the kernels accept, without copying it
+    @param buffer: bytearray or array.array holding the board data
+    @param typecode: array module typecode of the buffer's elements
+    @return: A NumPy view sharing memory with buffer if Numba is available, otherwise buffer itself
+    """
+    if HAS_NUMBA:
+        return np.frombuffer(buffer, dtype=typecode)
+    return buffer
+
+
+def _incoming_arcs(field):
+    """
+    @return: Numbers of the arcs (xk, field) for every neighbour xk of field
+    """
+    return [xk * 20 + NEIGHBORS[xk].index(field) for xk in NEIGHBORS[field]]
+
+
+def _cover_columns(row):
+    """
+    @param row: Exact cover row of placing a value in a field
+    @return: The four constraint columns the row covers
+    """
+    field, digit = divmod(row, 9)
+    return [field, 81 + ROW_OF[field] * 9 + digit, 162 + COL_OF[field] * 9 + digit, 243 + BOX_OF[field] * 9 + digit]
+
+
+def _column_rows():
+    """
+    @return: For every exact cover column, the rows covering it in ascending order
+    """
+    column_rows = [[] for _ in range(COVER_COLUMN_COUNT)]
+    for row in range(COVER_ROW_COUNT):
+        for column in _cover_columns(row):
+            column_rows[column].append(row)
+    return column_rows
+
+
+def _index_table(rows):
+    """
+    @param rows: Equally long lists of indices
+    @return: The rows as an int32 matrix, or as a tuple of int32 arrays without Numba, so the kernels can
+    index either and copy a row out with one slice assignment
+    """
+    if HAS_NUMBA:
+        return np.array(rows, dtype=np.int32)
+    return tuple(array('i', row) for row in rows)
+
+
+# Neighbour table in the form passed to the kernels
+KERNEL_NEIGHBORS = np.array(NEIGHBORS, dtype=np.int8) if HAS_NUMBA else NEIGHBORS
+# INCOMING_ARCS[field] holds the 20 arcs to queue once field is finalized
+INCOMING_ARCS = _index_table([_incoming_arcs(field) for field in range(81)])
+# COVER_ROWS[row] holds the 4 columns an exact cover row covers, COVER_COLUMNS[column] the 9 rows covering it
+COVER_ROWS = _index_table([_cover_columns(row) for row in range(COVER_ROW_COUNT)])
+COVER_COLUMNS = _index_table(_column_rows())
+
+
+@njit(cache=True, nogil=True)
+def popcount(mask):
+    """
+    @param mask: Domain bitmask
+    @return: Number of candidates in the domain
+    """
+    count = 0
+    while mask:
+        mask &= mask - 1
+        count += 1
+    return count
+
+
+@njit(cache=True, nogil=True)
+def degree(values, neighbors, field):
+    """
+    @return: Number of unassigned neighbours constraining the given field
+    """
+    count = 0
+    for neighbor in neighbors[field]:
+        if values[neighbor] == 0:
+            count += 1
+    return count
+
+
+@njit(cache=True, nogil=True)
+def revise(values, domains, neighbors, counters, xi, xj):
+    """
+    Revises the domain of xi to maintain arc consistency with xj.
+    Only processes non-finalized fields. If a single value is left in the domain of xi, xi is finalized
+    with it straight away.
+    @return: UNCHANGED, REVISED, FINALIZED, or WIPED_OUT if no consistent value is left for xi
+    """
+    if values[xi]:
+        return UNCHANGED
+
+    xj_value = values[xj]
+    if not (xj_value and domains[xi] >> xj_value & 1):
+        return UNCHANGED
+
+    domains[xi] &= ~(1 << xj_value)
+    counters[DOMAIN_REDUCTIONS] += 1
+    domain = domains[xi]
+    if domain == 0:  # Domain wipeout
+        return WIPED_OUT
+    if domain & (domain - 1):
+        return REVISED
+
+    # A single value is left; domain - 1 has exactly its lower bits set
+    value = popcount(domain - 1)
+    for neighbor in neighbors[xi]:
+        if values[neighbor] == value:
+            return WIPED_OUT
+    values[xi] = value
+    counters[ASSIGNMENTS] += 1
+    return FINALIZED
+
+
+@njit(cache=True, nogil=True)
+def order_arcs(values, domains, neighbors, queue, start, end, use_mrv, use_degree):
+    """
+    Sorts the arcs (xk, xi) in queue[start:end] so that those of the fields xk with the smallest domain
+    and/or the most unassigned neighbours come first. The sort is stable.
+    @param use_mrv: Order by domain size
+    @param use_degree: Order by number of unassigned neighbours, with domain size as tie-breaker
+    """
+    # Store the heuristic sort key above the arc bits and insertion sort by it
+    for a in range(start, end):
+        xk = queue[a] // 20
+        key = 0
+        if use_mrv:
+            key = popcount(domains[xk])
+        if use_degree:
+            key += (20 - degree(values, neighbors, xk)) << 4
+        queue[a] |= key << ARC_BITS
+    for a in range(start + 1, end):
+        entry = queue[a]
+        b = a - 1
+        while b >= start and queue[b] > entry:
+            queue[b + 1] = queue[b]
+            b -= 1
+        queue[b + 1] = entry
+    for a in range(start, end):
+        queue[a] &= ARC_MASK
+
+
+@njit(cache=True, nogil=True)
+def ac3(values, domains, neighbors, incoming_arcs, queue, counters, use_mrv, use_degree):
+    """
+    Applies the AC-3 algorithm to enforce arc consistency.
+    Arcs (xi, xj) with a finalized xj are the only ones revise can act on, so only those are queued: all
+    arcs into a field are queued once it is finalized. A revision that leaves xi with several values
+    queues nothing, as the arcs into xi cannot change anything until xi is finalized, at which point
+    they are queued anyway. Fields whose domain is already down to a single value are finalized before
+    the first arc is revised.
+    @param incoming_arcs: INCOMING_ARCS
+    @param queue: Scratch int32 array of QUEUE_SIZE elements
+    @param use_mrv: Re-add arcs of fields with the smallest domain first
+    @param use_degree: Re-add arcs of fields with the most unassigned neighbours first
+    @return: False if a domain was wiped out, True otherwise
+    """
+    head = 0
+    tail = 0
+    # Only arcs into finalized fields can revise anything, so those are the only ones to start from
+    for field in range(81):
+        if not values[field]:
+            domain = domains[field]
+            if domain & (domain - 1):
+                continue
+            # Naked single (e.g. left by preprocessing) that no revision would finalize anymore
+            if domain == 0:
+                return False
+            value = popcount(domain - 1)
+            for neighbor in neighbors[field]:
+                if values[neighbor] == value:
+                    return False
+            values[field] = value
+            counters[ASSIGNMENTS] += 1
+        start = tail
+        tail += 20
+        queue[start:tail] = incoming_arcs[field]
+
+    while head < tail:
+        arc = queue[head]
+        head += 1
+        xi, slot = divmod(arc, 20)
+        result = revise(values, domains, neighbors, counters, xi, neighbors[xi][slot])
+        if result == WIPED_OUT:
+            return False
+        if result != FINALIZED:
+            continue
+
+        # Add the arcs into the newly finalized xi
+        start = tail
+        tail += 20
+        queue[start:tail] = incoming_arcs[xi]
+        if use_mrv or use_degree:
+            order_arcs(values, domains, neighbors, queue, start, tail, use_mrv, use_degree)
+    return True
+
+
+@njit(cache=True, nogil=True)
+def is_consistent(values, neighbors, counters, field, value):
+    """
+    Checks if assigning 'value' to 'field' is consistent with the Sudoku rules.
+    """
+    for neighbor in neighbors[field]:
+        counters[CONSTRAINT_CHECKS] += 1  # Increment constraint check count
+        if values[neighbor] == value:
+            return False
+    return True
+
+
+@njit(cache=True, nogil=True)
+def select_field(values, domains, neighbors, unassigned, free, use_mrv, use_degree):
+    """
+    Selects the next field to assign during backtracking. Ties go to the field with the lowest index.
+    @param unassigned: Array whose first free elements are the unassigned fields, in no particular order
+    @param free: Number of unassigned fields
+    @param use_mrv: Select the unassigned field with the smallest domain
+    @param use_degree: Among fields with equal domain size, select the one with the most unassigned neighbours
+    @return: Index of the selected field, -1 if all fields are assigned
+    """
+    if free == 0:
+        return -1
+
+    field = unassigned[0]  # Default choice: the first unassigned field
+    for k in range(1, free):
+        if unassigned[k] < field:
+            field = unassigned[k]
+
+    if use_mrv:
+        min_domain_size = popcount(domains[field])
+        for k in range(free):
+            i = unassigned[k]
+            domain_size = popcount(domains[i])
+            if domain_size < min_domain_size or (domain_size == min_domain_size and i < field):
+                min_domain_size = domain_size
+                field = i
+    if use_degree:
+        min_domain_size = popcount(domains[field])
+        best_degree = -1
+        for k in range(free):
+            i = unassigned[k]
+            if popcount(domains[i]) == min_domain_size:
+                field_degree = degree(values, neighbors, i)
+                if field_degree > best_degree or (field_degree == best_degree and i < field):
+                    best_degree = field_degree
+                    field = i
+    return field
+
+
+@njit(cache=True, nogil=True)
+def least_constraining_value(values, domains, neighbors, field, candidates):
+    """
+    Selects the value to try next for a field, ruling out the fewest values for its neighbours.
+    @param candidates: Bitmask of the values left to try, must not be empty
+    @return: The value in candidates that occurs in the domains of the fewest unassigned neighbours,
+    the lowest such value on ties
+    """
+    best_value = 0
+    best_count = 21
+    while candidates:
+        lowest = candidates & -candidates
+        candidates ^= lowest
+        count = 0
+        for neighbor in neighbors[field]:
+            if values[neighbor] == 0 and domains[neighbor] & lowest:
+                count += 1
+        if count < best_count:
+            best_count = count
+            best_value = popcount(lowest - 1)
+    return best_value
+
+
+@njit(cache=True, nogil=True)
+def undo(values, domains, field, trail, start, top):
+    """
+    Unassigns field and restores the domain values removed by forward checking since trail position start.
+    @return: The new top of the trail
+    """
+    for position in range(start, top):
+        entry = trail[position]
+        domains[entry >> 4] |= 1 << (entry & 15)
+    values[field] = 0
+    return start
+
+
+@njit(cache=True)
+def backtrack(values, domains, neighbors, counters, use_mrv, use_degree, use_lcv, start_time, timeout,
+              stack_field, stack_candidates, trail, trail_start, unassigned, position):
+    """
+    Performs backtracking search with forward checking to assign values to all fields.
+    The search keeps an explicit stack instead of recursing: level d holds the field assigned at that depth
+    (stack_field), the values not yet tried for it (stack_candidates) and where its forward-checking removals
+    start on the trail (trail_start), so backtracking only has to put those domain values back.
+    The unassigned fields are kept in the first free elements of unassigned, with position giving the index
+    of each field in it. Assigned fields are swapped to just behind that prefix, so undoing the most
+    recent assignment only has to grow it by one again.
+    @param use_mrv: Select the unassigned field with the smallest domain
+    @param use_degree: Among fields with equal domain size, select the one with the most unassigned neighbours
+    @param use_lcv: Try the least constraining value first instead of the lowest one
+    @param start_time: time.monotonic() at which solving started
+    @param timeout: Time limit in seconds, checked every TIMEOUT_CHECK_INTERVAL nodes, 0 to disable
+    @param stack_field: Scratch int8 array of 81 elements
+    @param stack_candidates: Scratch uint16 array of 81 elements
+    @param trail: Scratch int32 array of TRAIL_SIZE elements
+    @param trail_start: Scratch int32 array of 81 elements
+    @param unassigned: Scratch int8 array of 81 elements
+    @param position: Scratch int8 array of 81 elements
+    @return: SOLVED, UNSOLVABLE or TIMED_OUT
+    """
+    free = 0
+    for i in range(81):
+        if values[i] == 0:
+            unassigned[free] = i
+            position[i] = free
+            free += 1
+
+    depth = 0
+    trail_top = 0
+    descend = True
+    while True:
+        if descend:
+            counters[RECURSIVE_CALLS] += 1
+            # Add a timeout check periodically
+            if timeout and counters[RECURSIVE_CALLS] % TIMEOUT_CHECK_INTERVAL == 0:
+                with objmode(now='float64'):
+                    now = time.monotonic()
+                if now - start_time > timeout:
+                    return TIMED_OUT
+
+            field = select_field(values, domains, neighbors, unassigned, free, use_mrv, use_degree)
+            if field == -1:
+                return SOLVED
+            stack_field[depth] = field
+            stack_candidates[depth] = domains[field]
+            descend = False
+
+        field = stack_field[depth]
+        candidates = stack_candidates[depth]
+        if candidates == 0:
+            # Every value failed at this depth, so undo the assignment one level up
+            if depth == 0:
+                return UNSOLVABLE
+            depth -= 1
+            free += 1
+            trail_top = undo(values, domains, stack_field[depth], trail, trail_start[depth], trail_top)
+            continue
+
+        if use_lcv:
+            value = least_constraining_value(values, domains, neighbors, field, candidates)
+            stack_candidates[depth] = candidates ^ (1 << value)
+        else:
+            # Take the lowest candidate; lowest - 1 has exactly the bits below it set
+            lowest = candidates & -candidates
+            stack_candidates[depth] = candidates ^ lowest
+            value = popcount(lowest - 1)
+
+        # Forward checking keeps every value left in a domain consistent with the assigned neighbours,
+        # so the value can be assigned without checking it against them again
+        values[field] = value
+        counters[ASSIGNMENTS] += 1
+
+        # Forward checking: remove value from the domains of unassigned neighbours
+        trail_start[depth] = trail_top
+        wipeout = False
+        for neighbor in neighbors[field]:
+            counters[CONSTRAINT_CHECKS] += 1
+            if values[neighbor] == 0 and domains[neighbor] >> value & 1:
+                domains[neighbor] &= ~(1 << value)
+                trail[trail_top] = neighbor << 4 | value
+                trail_top += 1
+                counters[DOMAIN_REDUCTIONS] += 1
+                if domains[neighbor] == 0:
+                    wipeout = True
+                    break
+
+        if wipeout:
+            trail_top = undo(values, domains, field, trail, trail_start[depth], trail_top)
+        else:
+            # Swap field with the last unassigned field and drop it from the prefix
+            free -= 1
+            last = unassigned[free]
+            unassigned[position[field]] = last
+            position[last] = position[field]
+            unassigned[free] = field
+            position[field] = free
+            depth += 1
+            descend = True
+
+
+@njit(cache=True, nogil=True)
+def block_row(cover_rows, column_size, blocked, row):
+    """
+    Takes row out of the columns it covers, unless a selected row or the domains already did so.
+    blocked counts the reasons a row is out, so every block_row is undone by exactly one unblock_row.
+    """
+    blocked[row] += 1
+    if blocked[row] == 1:
+        for column in cover_rows[row]:
+            column_size[column] -= 1
+
+
+@njit(cache=True, nogil=True)
+def unblock_row(cover_rows, column_size, blocked, row):
+    """
+    Undoes block_row, putting row back into its columns once nothing blocks it anymore.
+    """
+    blocked[row] -= 1
+    if blocked[row] == 0:
+        for column in cover_rows[row]:
+            column_size[column] += 1
+
+
+@njit(cache=True, nogil=True)
+def select_row(cover_rows, cover_columns, column_size, covered, blocked, counters, row):
+    """
+    Adds row to the cover: covers its four columns and blocks every row that shares one of them.
+    """
+    for column in cover_rows[row]:
+        covered[column] = True
+        for other in cover_columns[column]:
+            counters[CONSTRAINT_CHECKS] += 1
+            if other != row and blocked[other] == 0:
+                counters[DOMAIN_REDUCTIONS] += 1
+            block_row(cover_rows, column_size, blocked, other)
+
+
+@njit(cache=True, nogil=True)
+def deselect_row(cover_rows, cover_columns, column_size, covered, blocked, row):
+    """
+    Undoes select_row.
+    """
+    for column in cover_rows[row]:
+        covered[column] = False
+        for other in cover_columns[column]:
+            unblock_row(cover_rows, column_size, blocked, other)
+
+
+@njit(cache=True)
+def exact_cover(values, domains, cover_rows, cover_columns, counters, setup_counters, start_time, timeout,
+                column_size, covered, blocked, stack_column, stack_index, stack_row):
+    """
+    Solves the board as an exact cover problem with Algorithm X: each empty field, and each value in each
+    row, column and box, must be covered by exactly one selected row. The search always branches on the
+    uncovered column with the fewest rows left. Rows for values the domains no longer allow are blocked
+    up front, so pruning done by AC-3 carries over.
+    Like backtrack, the search keeps an explicit stack: level d holds the column branched on (stack_column),
+    the index in COVER_COLUMNS of the next row to try for it (stack_index) and the selected row (stack_row).
+    @param cover_rows: COVER_ROWS
+    @param cover_columns: COVER_COLUMNS
+    @param setup_counters: Scratch counters for selecting the finalized fields' rows, which is not search
+    @param start_time: time.monotonic() at which solving started
+    @param timeout: Time limit in seconds, checked every TIMEOUT_CHECK_INTERVAL nodes, 0 to disable
+    @param column_size: Scratch int8 array of COVER_COLUMN_COUNT elements
+    @param covered: Scratch int8 array of COVER_COLUMN_COUNT elements
+    @param blocked: Scratch int8 array of COVER_ROW_COUNT elements
+    @param stack_column: Scratch int16 array of 81 elements
+    @param stack_index: Scratch int8 array of 81 elements
+    @param stack_row: Scratch int16 array of 81 elements
+    @return: SOLVED, UNSOLVABLE or TIMED_OUT
+    """
+    for column in range(COVER_COLUMN_COUNT):
+        column_size[column] = 9
+    # Block the rows the domains rule out before selecting any, so the setup does not depend on field order
+    for field in range(81):
+        if not values[field]:
+            for value in range(1, 10):
+                if not domains[field] >> value & 1:
+                    block_row(cover_rows, column_size, blocked, field * 9 + value - 1)
+    for field in range(81):
+        value = values[field]
+        if value:
+            row = field * 9 + value - 1
+            if blocked[row]:  # Conflicts with another finalized field
+                return UNSOLVABLE
+            select_row(cover_rows, cover_columns, column_size, covered, blocked, setup_counters, row)
+
+    depth = 0
+    descend = True
+    while True:
+        if descend:
+            counters[RECURSIVE_CALLS] += 1
+            # Add a timeout check periodically
+            if timeout and counters[RECURSIVE_CALLS] % TIMEOUT_CHECK_INTERVAL == 0:
+                with objmode(now='float64'):
+                    now = time.monotonic()
+                if now - start_time > timeout:
+                    return TIMED_OUT
+
+            best = -1
+            for column in range(COVER_COLUMN_COUNT):
+                if not covered[column] and (best == -1 or column_size[column] < column_size[best]):
+                    best = column
+                    if column_size[best] < 2:  # Forced or dead end, nothing can beat it
+                        break
+            if best == -1:
+                return SOLVED
+            stack_column[depth] = best
+            stack_index[depth] = 0
+            stack_row[depth] = -1
+            descend = False
+
+        row = stack_row[depth]
+        if row != -1:
+            deselect_row(cover_rows, cover_columns, column_size, covered, blocked, row)
+            values[row // 9] = 0
+            stack_row[depth] = -1
+
+        rows = cover_columns[stack_column[depth]]
+        index = stack_index[depth]
+        while index < 9 and blocked[rows[index]]:
+            index += 1
+        if index == 9:
+            # Every row failed at this depth, so undo the selection one level up
+            if depth == 0:
+                return UNSOLVABLE
+            depth -= 1
+            continue
+
+        row = rows[index]
+        stack_index[depth] = index + 1
+        stack_row[depth] = row
+        select_row(cover_rows, cover_columns, column_size, covered, blocked, counters, row)
+        values[row // 9] = row % 9 + 1
+        counters[ASSIGNMENTS] += 1
+        depth += 1
+        descend = True